@@ -1,8 +1,23 @@
+import os
+import tempfile
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+
+# The mask builders live in their own module so the Numba kernel is compiled once per
+# process rather than redefined every time Streamlit reruns this script
+from mask_kernels import build_mask_numba, build_mask_numpy
+
+try:
+    import datashader as ds
+    import datashader.transfer_functions as tf
+except ImportError:
+    ds = None
 
 
 st.set_page_config(
@@ -31,21 +46,264 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 
+# Above this many points scatter plots are rasterized with Datashader (when installed)
+SCATTER_RASTER_THRESHOLD = 5000
+
+CSV_PATH = 'StudentsPerformance_Updated.csv'
+PARQUET_PATH = 'StudentsPerformance_Updated.parquet'
+
+# Results tables longer than this are paginated
+PAGINATE_THRESHOLD = 1000
+ROWS_PER_PAGE = 100
+
+CATEGORY_COLUMNS = ['gender', 'race/ethnicity', 'parental level of education', 'lunch', 'test preparation course']
+
+# Scores (0-100) and attendance (0-10) fit in int8, so every scan touches fewer bytes
+NUMERIC_COLUMN_TYPES = {
+    'math score': pa.int8(),
+    'reading score': pa.int8(),
+    'writing score': pa.int8(),
+    'Attendance': pa.int8(),
+    'StudyHours': pa.float32(),
+    'avg_Score': pa.float32(),
+}
+
+
+def prepare_student_data(df):
+    # Categorical filters compare small integer codes instead of Python strings
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    return df
+
+
+def read_student_csv(source):
+    # Arrow parses the CSV in multithreaded C++ straight into the narrow numeric types
+    table = pa_csv.read_csv(
+        source,
+        convert_options=pa_csv.ConvertOptions(column_types=NUMERIC_COLUMN_TYPES)
+    )
+    return prepare_student_data(table.to_pandas())
+
+
+def has_expected_dtypes(df):
+    # A sidecar written under an older schema is rebuilt rather than trusted
+    return (
+        all(col in df and isinstance(df[col].dtype, pd.CategoricalDtype) for col in CATEGORY_COLUMNS) and
+        all(col in df and df[col].dtype == pa_type.to_pandas_dtype() for col, pa_type in NUMERIC_COLUMN_TYPES.items())
+    )
+
+
+def read_parquet_sidecar():
+    try:
+        df = pd.read_parquet(PARQUET_PATH)
+    except Exception:
+        # Truncated or unreadable sidecar; the CSV is parsed again and the sidecar rewritten
+        return None
+    return df if has_expected_dtypes(df) else None
+
+
+def write_parquet_sidecar(df):
+    # Write to a temporary file and swap it in, so a killed process or two sessions
+    # writing at once never leave a truncated sidecar behind
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(PARQUET_PATH)), suffix='.parquet.tmp')
+        os.close(fd)
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, PARQUET_PATH)
+    except OSError:
+        # Read-only directory: keep serving the parsed CSV without a sidecar
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 @st.cache_data
 def load_student_data():
     # You need to upload the CSV file to the same directory as your script
     # Or use the file uploader below
     try:
-        df = pd.read_csv('StudentsPerformance_Updated.csv')
+        # A Parquet sidecar keeps the parsed dtypes, so cold starts skip CSV parsing entirely
+        if os.path.exists(PARQUET_PATH) and (
+            not os.path.exists(CSV_PATH) or os.path.getmtime(PARQUET_PATH) >= os.path.getmtime(CSV_PATH)
+        ):
+            df = read_parquet_sidecar()
+            if df is not None:
+                return df
+        df = read_student_csv(CSV_PATH)
+        write_parquet_sidecar(df)
         return df
     except:
         return None
 
 
+@st.cache_data
+def get_filter_options(df):
+    return {
+        col: ['All'] + sorted(df[col].cat.categories.tolist())
+        for col in CATEGORY_COLUMNS
+    }
+
+
+@st.cache_data(max_entries=32)
+def apply_filters(df, gender_filter, race_filter, education_filter, lunch_filter, prep_filter,
+                  math_min, math_max, reading_min, reading_max, writing_min, writing_max,
+                  attendance_min, attendance_max, study_hours_min, study_hours_max, avg_score_min):
+    # Pull each column out as a bare ndarray once so the compares skip the Series layer
+    math = df['math score'].to_numpy()
+    reading = df['reading score'].to_numpy()
+    writing = df['writing score'].to_numpy()
+    attendance = df['Attendance'].to_numpy()
+    study_hours = df['StudyHours'].to_numpy()
+    avg_score = df['avg_Score'].to_numpy()
+
+    category_filters = {
+        'gender': gender_filter,
+        'race/ethnicity': race_filter,
+        'parental level of education': education_filter,
+        'lunch': lunch_filter,
+        'test preparation course': prep_filter,
+    }
+
+    # Compare floats in the column's own precision, as NumPy does; otherwise the float64
+    # widget values drop float32 rows that sit exactly on a 0.1 step
+    study_hours_min = study_hours.dtype.type(study_hours_min)
+    study_hours_max = study_hours.dtype.type(study_hours_max)
+    avg_score_min = avg_score.dtype.type(avg_score_min)
+
+    # Integer category codes plus the wanted code per column, -1 meaning "All"
+    codes = [df[col].cat.codes.to_numpy() for col in category_filters]
+    targets = np.array([
+        -1 if value == 'All' else df[col].cat.categories.get_loc(value)
+        for col, value in category_filters.items()
+    ], dtype=np.int64)
+
+    if build_mask_numba is not None:
+        # The kernel needs one 2-D array; columns with many categories get wider codes,
+        # so stack at the common dtype rather than a fixed one
+        code_dtype = np.result_type(*codes)
+        codes = np.stack([column_codes.astype(code_dtype, copy=False) for column_codes in codes])
+        build_mask = build_mask_numba
+    else:
+        build_mask = build_mask_numpy
+    mask = build_mask(
+        math, reading, writing, attendance, study_hours, avg_score, codes, targets,
+        math_min, math_max, reading_min, reading_max, writing_min, writing_max,
+        attendance_min, attendance_max, study_hours_min, study_hours_max, avg_score_min
+    )
+
+    return df.iloc[np.flatnonzero(mask)]
+
+
+def group_means(filtered_df, column):
+    # Mean avg_Score per category via bincount on the category codes, skipping pandas groupby
+    codes = filtered_df[column].cat.codes.to_numpy()
+    categories = filtered_df[column].cat.categories
+    sums = np.bincount(codes, weights=filtered_df['avg_Score'].to_numpy(), minlength=len(categories))
+    counts = np.bincount(codes, minlength=len(categories))
+    observed = counts > 0
+    return pd.DataFrame({
+        column: categories[observed],
+        'avg_Score': sums[observed] / counts[observed]
+    })
+
+
+@st.cache_data(max_entries=32)
+def fig_subject_bar(subject_means):
+    chart_data = pd.DataFrame({
+        'Subject': ['Math', 'Reading', 'Writing'],
+        'Average': list(subject_means)
+    })
+    fig = px.bar(
+        chart_data,
+        x='Subject',
+        y='Average',
+        color='Subject',
+        color_discrete_map={
+            'Math': '#3b82f6',
+            'Reading': '#10b981',
+            'Writing': '#f59e0b'
+        },
+        title="Average Scores by Subject"
+    )
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='white',
+        showlegend=False
+    )
+    return fig
+
+
+@st.cache_data(max_entries=32)
+def fig_histogram(counts, edges, column, title, color):
+    # Bins are counted with np.histogram so only the bar heights reach the browser
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        marker_color=color
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=column,
+        yaxis_title='count',
+        bargap=0,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='white'
+    )
+    return fig
+
+
+@st.cache_data(max_entries=32)
+def fig_scatter(filtered_df, x, color, title, color_map):
+    fig = px.scatter(
+        filtered_df,
+        x=x,
+        y='avg_Score',
+        color=color,
+        title=title,
+        hover_data=['gender', 'race/ethnicity'],
+        color_discrete_map=color_map
+    )
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='white'
+    )
+    return fig
+
+
+@st.cache_data(max_entries=32)
+def raster_scatter(filtered_df, x, color, color_map):
+    canvas = ds.Canvas(plot_width=600, plot_height=400)
+    agg = canvas.points(filtered_df, x, 'avg_Score', ds.by(color, ds.count()))
+    return tf.shade(agg, color_key=color_map).to_pil()
+
+
+@st.cache_data(max_entries=32)
+def fig_group_bar(group_data, column, title, color_map):
+    fig = px.bar(
+        group_data,
+        x=column,
+        y='avg_Score',
+        color=column,
+        title=title,
+        color_discrete_map=color_map
+    )
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='white',
+        showlegend=False
+    )
+    return fig
+
+
 uploaded_file = st.file_uploader("Upload StudentsPerformance_Updated.csv", type=['csv'])
 
 if uploaded_file is not None:
-    df = pd.read_csv(uploaded_file)
+    df = read_student_csv(uploaded_file)
 else:
     df = load_student_data()
 
@@ -59,34 +317,36 @@ if df is not None:
     st.markdown("<h2>🔍 INPUT: Filters</h2>", unsafe_allow_html=True)
 
    
+    filter_options = get_filter_options(df)
+
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
         gender_filter = st.selectbox(
             "Gender",
-            options=['All'] + sorted(list(df['gender'].unique()))
+            options=filter_options['gender']
         )
         
         race_filter = st.selectbox(
             "Race/Ethnicity",
-            options=['All'] + sorted(list(df['race/ethnicity'].unique()))
+            options=filter_options['race/ethnicity']
         )
 
     with col2:
         education_filter = st.selectbox(
             "Parental Education",
-            options=['All'] + sorted(list(df['parental level of education'].unique()))
+            options=filter_options['parental level of education']
         )
         
         lunch_filter = st.selectbox(
             "Lunch Program",
-            options=['All'] + sorted(list(df['lunch'].unique()))
+            options=filter_options['lunch']
         )
 
     with col3:
         prep_filter = st.selectbox(
             "Test Prep",
-            options=['All'] + sorted(list(df['test preparation course'].unique()))
+            options=filter_options['test preparation course']
         )
         
         attendance_min = st.number_input("Attendance Min", min_value=0, max_value=10, value=0, step=1)
@@ -129,41 +389,39 @@ if df is not None:
     st.markdown("---")
 
     
-    filtered_df = df.copy()
-
-    if gender_filter != 'All':
-        filtered_df = filtered_df[filtered_df['gender'] == gender_filter]
-
-    if race_filter != 'All':
-        filtered_df = filtered_df[filtered_df['race/ethnicity'] == race_filter]
-
-    if education_filter != 'All':
-        filtered_df = filtered_df[filtered_df['parental level of education'] == education_filter]
-
-    if lunch_filter != 'All':
-        filtered_df = filtered_df[filtered_df['lunch'] == lunch_filter]
+    if uploaded_file is not None:
+        data_id = uploaded_file.file_id
+    else:
+        # The bundled data changes whenever the CSV or its Parquet sidecar is rewritten
+        data_id = tuple(
+            os.path.getmtime(path) if os.path.exists(path) else None
+            for path in (CSV_PATH, PARQUET_PATH)
+        )
 
-    if prep_filter != 'All':
-        filtered_df = filtered_df[filtered_df['test preparation course'] == prep_filter]
+    filter_sig = (
+        data_id,
+        gender_filter, race_filter, education_filter, lunch_filter, prep_filter,
+        math_min, math_max, reading_min, reading_max, writing_min, writing_max,
+        attendance_min, attendance_max, study_hours_min, study_hours_max, avg_score_min
+    )
 
-    filtered_df = filtered_df[
-        (filtered_df['math score'] >= math_min) & 
-        (filtered_df['math score'] <= math_max) &
-        (filtered_df['reading score'] >= reading_min) & 
-        (filtered_df['reading score'] <= reading_max) &
-        (filtered_df['writing score'] >= writing_min) & 
-        (filtered_df['writing score'] <= writing_max) &
-        (filtered_df['Attendance'] >= attendance_min) &
-        (filtered_df['Attendance'] <= attendance_max) &
-        (filtered_df['StudyHours'] >= study_hours_min) &
-        (filtered_df['StudyHours'] <= study_hours_max) &
-        (filtered_df['avg_Score'] >= avg_score_min)
-    ]
+    # Reruns that leave the filters untouched (e.g. paging the table) reuse the last result
+    if st.session_state.get('last_sig') == filter_sig:
+        filtered_df = st.session_state['filtered_df']
+    else:
+        filtered_df = apply_filters(df, *filter_sig[1:])
+        st.session_state['last_sig'] = filter_sig
+        st.session_state['filtered_df'] = filtered_df
 
     
     if len(filtered_df) > 0:
         st.markdown("<h2>📈 OUTPUT: Results</h2>", unsafe_allow_html=True)
         
+        # All column averages in one NumPy reduction
+        math_mean, reading_mean, writing_mean, study_hours_mean, attendance_mean, avg_score_mean = filtered_df[
+            ['math score', 'reading score', 'writing score', 'StudyHours', 'Attendance', 'avg_Score']
+        ].to_numpy(np.float64).mean(axis=0)
+        
         # Statistics Cards
         col1, col2, col3, col4, col5 = st.columns(5)
         
@@ -176,25 +434,25 @@ if df is not None:
         with col2:
             st.metric(
                 label="Avg Math",
-                value=f"{filtered_df['math score'].mean():.2f}"
+                value=f"{math_mean:.2f}"
             )
         
         with col3:
             st.metric(
                 label="Avg Reading",
-                value=f"{filtered_df['reading score'].mean():.2f}"
+                value=f"{reading_mean:.2f}"
             )
         
         with col4:
             st.metric(
                 label="Avg Study Hours",
-                value=f"{filtered_df['StudyHours'].mean():.2f}"
+                value=f"{study_hours_mean:.2f}"
             )
         
         with col5:
             st.metric(
                 label="Avg Attendance",
-                value=f"{filtered_df['Attendance'].mean():.2f}"
+                value=f"{attendance_mean:.2f}"
             )
         
         st.markdown("---")
@@ -207,49 +465,13 @@ if df is not None:
             
             with col1:
                 st.markdown("### Subject Score Distribution")
-                chart_data = pd.DataFrame({
-                    'Subject': ['Math', 'Reading', 'Writing'],
-                    'Average': [
-                        filtered_df['math score'].mean(),
-                        filtered_df['reading score'].mean(),
-                        filtered_df['writing score'].mean()
-                    ]
-                })
-                
-                fig = px.bar(
-                    chart_data,
-                    x='Subject',
-                    y='Average',
-                    color='Subject',
-                    color_discrete_map={
-                        'Math': '#3b82f6',
-                        'Reading': '#10b981',
-                        'Writing': '#f59e0b'
-                    },
-                    title="Average Scores by Subject"
-                )
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white',
-                    showlegend=False
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                subject_means = (math_mean, reading_mean, writing_mean)
+                st.plotly_chart(fig_subject_bar(subject_means), use_container_width=True)
             
             with col2:
                 st.markdown("### Average Score Distribution")
-                fig = px.histogram(
-                    filtered_df,
-                    x='avg_Score',
-                    nbins=20,
-                    title="Distribution of Average Scores",
-                    color_discrete_sequence=['#8b5cf6']
-                )
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white'
-                )
+                counts, edges = np.histogram(filtered_df['avg_Score'].to_numpy(), bins=20)
+                fig = fig_histogram(counts, edges, 'avg_Score', "Distribution of Average Scores", '#8b5cf6')
                 st.plotly_chart(fig, use_container_width=True)
         
         with tab2:
@@ -257,78 +479,63 @@ if df is not None:
             
             with col1:
                 st.markdown("### Study Hours vs Average Score")
-                fig = px.scatter(
-                    filtered_df,
-                    x='StudyHours',
-                    y='avg_Score',
-                    color='test preparation course',
-                    title="Study Hours Impact on Performance",
-                    hover_data=['gender', 'race/ethnicity'],
-                    color_discrete_map={'none': '#ef4444', 'completed': '#10b981'}
-                )
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white'
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                if ds is not None and len(filtered_df) > SCATTER_RASTER_THRESHOLD:
+                    img = raster_scatter(filtered_df, 'StudyHours', 'test preparation course', {'none': '#ef4444', 'completed': '#10b981'})
+                    st.image(img, caption="Study Hours Impact on Performance", use_container_width=True)
+                else:
+                    fig = fig_scatter(
+                        filtered_df,
+                        'StudyHours',
+                        'test preparation course',
+                        "Study Hours Impact on Performance",
+                        {'none': '#ef4444', 'completed': '#10b981'}
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
             
             with col2:
                 st.markdown("### Attendance vs Average Score")
-                fig = px.scatter(
-                    filtered_df,
-                    x='Attendance',
-                    y='avg_Score',
-                    color='lunch',
-                    title="Attendance Impact on Performance",
-                    hover_data=['gender', 'race/ethnicity'],
-                    color_discrete_map={'standard': '#3b82f6', 'free/reduced': '#f59e0b'}
-                )
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white'
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                if ds is not None and len(filtered_df) > SCATTER_RASTER_THRESHOLD:
+                    img = raster_scatter(filtered_df, 'Attendance', 'lunch', {'standard': '#3b82f6', 'free/reduced': '#f59e0b'})
+                    st.image(img, caption="Attendance Impact on Performance", use_container_width=True)
+                else:
+                    fig = fig_scatter(
+                        filtered_df,
+                        'Attendance',
+                        'lunch',
+                        "Attendance Impact on Performance",
+                        {'standard': '#3b82f6', 'free/reduced': '#f59e0b'}
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
         
         with tab3:
             col1, col2 = st.columns(2)
             
             with col1:
                 st.markdown("### Performance by Test Prep")
-                prep_data = filtered_df.groupby('test preparation course')['avg_Score'].mean().reset_index()
-                fig = px.bar(
+                # A pinned filter leaves a single group whose mean is the overall mean
+                if prep_filter != 'All':
+                    prep_data = pd.DataFrame({'test preparation course': [prep_filter], 'avg_Score': [avg_score_mean]})
+                else:
+                    prep_data = group_means(filtered_df, 'test preparation course')
+                fig = fig_group_bar(
                     prep_data,
-                    x='test preparation course',
-                    y='avg_Score',
-                    color='test preparation course',
-                    title="Test Prep Impact",
-                    color_discrete_map={'none': '#ef4444', 'completed': '#10b981'}
-                )
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white',
-                    showlegend=False
+                    'test preparation course',
+                    "Test Prep Impact",
+                    {'none': '#ef4444', 'completed': '#10b981'}
                 )
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
                 st.markdown("### Performance by Lunch Program")
-                lunch_data = filtered_df.groupby('lunch')['avg_Score'].mean().reset_index()
-                fig = px.bar(
+                if lunch_filter != 'All':
+                    lunch_data = pd.DataFrame({'lunch': [lunch_filter], 'avg_Score': [avg_score_mean]})
+                else:
+                    lunch_data = group_means(filtered_df, 'lunch')
+                fig = fig_group_bar(
                     lunch_data,
-                    x='lunch',
-                    y='avg_Score',
-                    color='lunch',
-                    title="Lunch Program Impact",
-                    color_discrete_map={'standard': '#3b82f6', 'free/reduced': '#f59e0b'}
-                )
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white',
-                    showlegend=False
+                    'lunch',
+                    "Lunch Program Impact",
+                    {'standard': '#3b82f6', 'free/reduced': '#f59e0b'}
                 )
                 st.plotly_chart(fig, use_container_width=True)
         
@@ -337,34 +544,15 @@ if df is not None:
             
             with col1:
                 st.markdown("### Study Hours Distribution")
-                fig = px.histogram(
-                    filtered_df,
-                    x='StudyHours',
-                    nbins=20,
-                    title="Study Hours Frequency",
-                    color_discrete_sequence=['#8b5cf6']
-                )
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white'
-                )
+                counts, edges = np.histogram(filtered_df['StudyHours'].to_numpy(), bins=20)
+                fig = fig_histogram(counts, edges, 'StudyHours', "Study Hours Frequency", '#8b5cf6')
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
                 st.markdown("### Attendance Distribution")
-                fig = px.histogram(
-                    filtered_df,
-                    x='Attendance',
-                    nbins=11,
-                    title="Attendance Frequency",
-                    color_discrete_sequence=['#3b82f6']
-                )
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white'
-                )
+                # One bin per attendance value 0-10
+                counts, edges = np.histogram(filtered_df['Attendance'].to_numpy(), bins=np.arange(-0.5, 11.5))
+                fig = fig_histogram(counts, edges, 'Attendance', "Attendance Frequency", '#3b82f6')
                 st.plotly_chart(fig, use_container_width=True)
         
         st.markdown("---")
@@ -372,9 +560,16 @@ if df is not None:
        
         st.markdown(f"### 📋 All Student Records ({len(filtered_df)} total)")
         
+        # Large results are shown one page at a time; the download still covers every row
+        table_df = filtered_df
+        if len(filtered_df) > PAGINATE_THRESHOLD:
+            page_count = (len(filtered_df) - 1) // ROWS_PER_PAGE + 1
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key="results_page")
+            st.caption(f"Showing page {page} of {page_count} ({ROWS_PER_PAGE} rows per page)")
+            table_df = filtered_df.iloc[(page - 1) * ROWS_PER_PAGE:page * ROWS_PER_PAGE]
         
         st.dataframe(
-            filtered_df,
+            table_df,
             use_container_width=True,
             height=400,
             column_config={
@@ -388,10 +583,10 @@ if df is not None:
         )
         
        
-        csv = filtered_df.to_csv(index=False)
+        # Passing a callable defers the CSV encoding until the button is actually clicked
         st.download_button(
             label="📥 Download Results as CSV",
-            data=csv,
+            data=lambda: filtered_df.to_csv(index=False).encode(),
             file_name="student_performance_results.csv",
             mime="text/csv",
         )
@@ -400,19 +595,28 @@ if df is not None:
         st.markdown("---")
         st.markdown("### 🔗 Correlation Analysis")
         
+        corr_data = filtered_df[['StudyHours', 'Attendance', 'avg_Score', 'math score', 'reading score']].to_numpy(np.float64)
+        # Rows with blank cells (possible in uploads) would otherwise turn every coefficient into NaN
+        corr_data = corr_data[~np.isnan(corr_data).any(axis=1)]
+        # A correlation needs at least two rows; np.cov warns about degrees of freedom otherwise
+        corr = None
+        if len(corr_data) >= 2:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                corr = np.corrcoef(corr_data, rowvar=False)
+        
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            corr_study_avg = filtered_df['StudyHours'].corr(filtered_df['avg_Score'])
-            st.metric("Study Hours ↔ Avg Score", f"{corr_study_avg:.3f}")
+            corr_study_avg = f"{corr[0, 2]:.3f}" if corr is not None else "n/a"
+            st.metric("Study Hours ↔ Avg Score", corr_study_avg)
         
         with col2:
-            corr_attend_avg = filtered_df['Attendance'].corr(filtered_df['avg_Score'])
-            st.metric("Attendance ↔ Avg Score", f"{corr_attend_avg:.3f}")
+            corr_attend_avg = f"{corr[1, 2]:.3f}" if corr is not None else "n/a"
+            st.metric("Attendance ↔ Avg Score", corr_attend_avg)
         
         with col3:
-            corr_math_read = filtered_df['math score'].corr(filtered_df['reading score'])
-            st.metric("Math ↔ Reading", f"{corr_math_read:.3f}")
+            corr_math_read = f"{corr[3, 4]:.3f}" if corr is not None else "n/a"
+            st.metric("Math ↔ Reading", corr_math_read)
 
     else:
         st.error("❌ No students match your filter criteria. Please adjust your filters.")
@@ -0,0 +1,63 @@
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+def in_range_u8(arr, lo, hi):
+    # lo <= arr <= hi as one unsigned compare: values below lo wrap around past hi - lo.
+    # Only valid for non-negative int8 arrays (bounded by 127), such as the scores and attendance.
+    if hi < lo:
+        return np.zeros(arr.shape, dtype=bool)
+    if arr.dtype.kind not in 'iu':
+        # Blank cells in an upload turn the column into float64 with NaNs, which never match
+        return (arr >= lo) & (arr <= hi)
+    return np.less_equal(np.subtract(arr, lo, dtype=np.int16).astype(np.uint8), np.uint8(hi - lo))
+
+
+def build_mask_numpy(math, reading, writing, attendance, study_hours, avg_score, codes, targets,
+                     math_min, math_max, reading_min, reading_max, writing_min, writing_max,
+                     attendance_min, attendance_max, study_hours_min, study_hours_max, avg_score_min):
+    # Fold each predicate into one mask in place; df itself is never copied
+    mask = np.ones(math.size, dtype=bool)
+    mask &= in_range_u8(math, math_min, math_max)
+    mask &= in_range_u8(reading, reading_min, reading_max)
+    mask &= in_range_u8(writing, writing_min, writing_max)
+    mask &= in_range_u8(attendance, attendance_min, attendance_max)
+    mask &= study_hours >= study_hours_min
+    mask &= study_hours <= study_hours_max
+    mask &= avg_score >= avg_score_min
+    for j in range(len(codes)):
+        # Only the columns pinned to one category are read
+        if targets[j] >= 0:
+            # Compare integer category codes rather than the string labels
+            mask &= codes[j] == targets[j]
+    return mask
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def build_mask_numba(math, reading, writing, attendance, study_hours, avg_score, codes, targets,
+                         math_min, math_max, reading_min, reading_max, writing_min, writing_max,
+                         attendance_min, attendance_max, study_hours_min, study_hours_max, avg_score_min):
+        # Evaluates every predicate in one threaded pass without intermediate bool arrays
+        n = math.size
+        out = np.empty(n, np.bool_)
+        for i in prange(n):
+            keep = (
+                math[i] >= math_min and math[i] <= math_max and
+                reading[i] >= reading_min and reading[i] <= reading_max and
+                writing[i] >= writing_min and writing[i] <= writing_max and
+                attendance[i] >= attendance_min and attendance[i] <= attendance_max and
+                study_hours[i] >= study_hours_min and study_hours[i] <= study_hours_max and
+                avg_score[i] >= avg_score_min
+            )
+            for j in range(len(codes)):
+                if keep and targets[j] >= 0 and codes[j, i] != targets[j]:
+                    keep = False
+            out[i] = keep
+        return out
+else:
+    build_mask_numba = None
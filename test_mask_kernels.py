@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from mask_kernels import build_mask_numba, build_mask_numpy, in_range_u8
+
+
+HOURS = np.arange(121) / 10
+SCORES = np.arange(1001) / 10
+
+
+def boundary_args(study_hours_min, study_hours_max, avg_score_min, target):
+    # Every 0.1 step of the float filters, stored as float32 like the loaded data
+    study_hours = np.resize(HOURS, SCORES.size).astype(np.float32)
+    avg_score = SCORES.astype(np.float32)
+    scores = np.resize(np.arange(101, dtype=np.int8), SCORES.size)
+    attendance = np.resize(np.arange(11, dtype=np.int8), SCORES.size)
+    codes = np.resize(np.arange(2, dtype=np.int8), (1, SCORES.size))
+    targets = np.array([target], dtype=np.int64)
+    return (
+        scores, scores, scores, attendance, study_hours, avg_score, codes, targets,
+        10, 90, 10, 90, 10, 90, 1, 9,
+        np.float32(study_hours_min), np.float32(study_hours_max), np.float32(avg_score_min)
+    )
+
+
+@pytest.mark.skipif(build_mask_numba is None, reason="numba is not installed")
+@pytest.mark.parametrize("target", [-1, 1])
+@pytest.mark.parametrize("index", range(HOURS.size))
+def test_numba_matches_numpy_on_float_boundaries(index, target):
+    hour = HOURS[index]
+    for study_hours_min, study_hours_max in ((hour, 12.0), (0.0, hour)):
+        args = boundary_args(study_hours_min, study_hours_max, SCORES[index * 8], target)
+        np.testing.assert_array_equal(build_mask_numba(*args), build_mask_numpy(*args))
+
+
+def test_numpy_keeps_rows_on_float_boundaries():
+    args = boundary_args(1.2, 1.2, 0.0, -1)
+    study_hours = args[4]
+    mask = build_mask_numpy(*args)
+    # Rows exactly at 1.2 hours pass the other filters wherever their integer columns allow
+    assert mask[study_hours == np.float32(1.2)].any()
+    assert not mask[study_hours != np.float32(1.2)].any()
+
+
+def test_in_range_u8_matches_plain_compare():
+    arr = np.arange(101, dtype=np.int8)
+    for lo, hi in ((0, 100), (10, 90), (50, 50), (90, 10)):
+        np.testing.assert_array_equal(in_range_u8(arr, lo, hi), (arr >= lo) & (arr <= hi))
+
+
+def test_in_range_u8_drops_nan_in_float_columns():
+    arr = np.array([5.0, np.nan, 50.0, 95.0])
+    np.testing.assert_array_equal(in_range_u8(arr, 0, 90), [True, False, True, False])